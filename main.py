@@ -1,9 +1,10 @@
 import logging
 import sys
+from pathlib import Path
 from appium import webdriver
 from appium.options.ios import XCUITestOptions
 
-from wio_exporter.config import default_config
+from wio_exporter.config import default_config, default_scraper_config
 from wio_exporter.scraper import TransactionScraper
 from wio_exporter.exporter import CSVExporter
 
@@ -49,19 +50,24 @@ def main():
 
         logger.info("Connected to device successfully")
 
-        scraper = TransactionScraper(driver)
+        state_path = default_scraper_config.state_path
+        scraper = TransactionScraper(
+            driver,
+            state_path=Path(state_path) if state_path else None,
+            account=default_scraper_config.account,
+        )
+        exporter = CSVExporter()
 
         logger.info("Starting transaction extraction...")
-        transactions = scraper.scrape_all_transactions()
+        with exporter:
+            count = scraper.scrape_all_transactions(exporter)
 
-        if not transactions:
+        if not count:
+            exporter.filepath.unlink(missing_ok=True)
             logger.warning("No spending transactions found!")
             return
 
-        exporter = CSVExporter()
-        output_file = exporter.export(transactions)
-
-        logger.info(f"✓ Successfully exported {len(transactions)} transactions to {output_file}")
+        logger.info(f"✓ Successfully exported {count} transactions to {exporter.filepath}")
 
     except Exception as e:
         logger.error(f"Error during execution: {e}", exc_info=True)
@@ -0,0 +1,27 @@
+import csv
+import itertools
+
+import pytest
+
+from wio_exporter.exporter import CSVExporter
+from wio_exporter.scraper import TransactionScraper
+
+
+@pytest.fixture
+def scrape(tmp_path):
+    """Run a full scrape against ``driver`` and return the exported CSV rows."""
+
+    run_numbers = itertools.count(1)
+
+    def run(driver, state_path=None, scraper=None):
+        scraper = scraper or TransactionScraper(driver, state_path=state_path)
+        exporter = CSVExporter(output_dir=tmp_path, filename=f"export_{next(run_numbers)}.csv")
+        with exporter:
+            count = scraper.scrape_all_transactions(exporter)
+
+        with open(exporter.filepath, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == count
+        return rows
+
+    return run
@@ -0,0 +1,99 @@
+"""An in-memory stand-in for the Appium driver that renders a scrolling list.
+
+Items are ``("header", text)`` or ``("row", text)`` pairs laid out top to
+bottom, ``ROW_PITCH`` points apart. ``mobile: source`` renders them with the
+list scrolled by ``offset`` and ``mobile: dragFromToWithVelocity`` moves the
+list, clamped at the end of the content like a real scroll view.
+"""
+from typing import List, Optional, Tuple
+from xml.sax.saxutils import quoteattr
+
+ROW_PITCH = 50
+ROW_HEIGHT = 40
+TOP_INSET = 60
+
+Item = Tuple[str, str]
+
+
+def row(description: str, amount: str, category: str = "Shopping") -> Item:
+    return ("row", f"{description}\n{category}\n{amount} AED")
+
+
+def header(text: str) -> Item:
+    return ("header", text)
+
+
+class FakeDriver:
+    def __init__(
+        self,
+        items: List[Item],
+        screen_height: int = 400,
+        fail_drags: int = 0,
+        drag_scale: float = 1.0,
+        offscreen_nodes: bool = True,
+        scroll_bar: bool = False,
+        lazy_items: Optional[List[Item]] = None,
+    ):
+        self.items = list(items)
+        self.screen_height = screen_height
+        self.fail_drags = fail_drags
+        self.drag_scale = drag_scale
+        self.offscreen_nodes = offscreen_nodes
+        self.scroll_bar = scroll_bar
+        self.lazy_items = list(lazy_items or [])
+        self.offset = 0
+        self.drags = 0
+
+    @property
+    def max_offset(self) -> int:
+        return max(0, TOP_INSET + len(self.items) * ROW_PITCH - self.screen_height)
+
+    def get_window_size(self):
+        return {"width": 390, "height": self.screen_height}
+
+    def execute_script(self, name, args):
+        if name == "mobile: source":
+            return self._source()
+        if name == "mobile: dragFromToWithVelocity":
+            return self._drag(args)
+        raise NotImplementedError(name)
+
+    def _source(self) -> str:
+        # Rows still to be loaded appear once the list has reached its end.
+        if self.lazy_items and self.offset == self.max_offset:
+            self.items.extend(self.lazy_items)
+            self.lazy_items = []
+
+        nodes = []
+        for i, (_, text) in enumerate(self.items):
+            y = TOP_INSET + i * ROW_PITCH - self.offset
+            visible = 0 < y < self.screen_height
+            if not visible and not self.offscreen_nodes:
+                continue
+            nodes.append(
+                f"<XCUIElementTypeStaticText value={quoteattr(text)} "
+                f'visible="{str(visible).lower()}" x="10" y="{y}" width="300" height="{ROW_HEIGHT}"/>'
+            )
+
+        if self.scroll_bar:
+            percent = round(100 * self.offset / self.max_offset) if self.max_offset else 0
+            pages = -(-(TOP_INSET + len(self.items) * ROW_PITCH) // self.screen_height)
+            nodes.append(
+                f'<XCUIElementTypeOther name="Vertical scroll bar, {pages} pages" '
+                f'value="{percent}%" visible="true" x="380" y="0" width="10" height="{self.screen_height}"/>'
+            )
+
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?><AppiumAUT><XCUIElementTypeApplication>'
+            + "".join(nodes)
+            + "</XCUIElementTypeApplication></AppiumAUT>"
+        )
+
+    def _drag(self, args):
+        self.drags += 1
+        if self.fail_drags:
+            self.fail_drags -= 1
+            raise RuntimeError("drag failed")
+
+        distance = int((args["fromY"] - args["toY"]) * self.drag_scale)
+        self.offset = max(0, min(self.max_offset, self.offset + distance))
@@ -0,0 +1,61 @@
+from datetime import date
+
+import pytest
+
+from wio_exporter.parser import TransactionParser, parse_date_header
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("-25.00 AED", -2500),
+    ("+1,234.56 AED", 123456),
+    ("AED -7.5", -750),
+    # Only the "AED" token and thousands commas are removed, so a sign or
+    # digit group separated by a space is not glued onto the number.
+    ("- 25.00 AED", 2500),
+    ("AED 1 234.56", 100),
+])
+def test_extract_amount(text, expected):
+    assert TransactionParser._extract_amount(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("-12.345 AED", -1234),
+    ("12.349 AED", 1234),
+    ("-12. AED", -1200),
+])
+def test_extract_amount_truncates_to_fils(text, expected):
+    assert TransactionParser._extract_amount(text) == expected
+
+
+def test_extract_amount_without_digits():
+    assert TransactionParser._extract_amount("AED") is None
+
+
+def test_parse_transaction_reads_amount_line():
+    txn = TransactionParser().parse_transaction("Starbucks\nFood\n-15.00 AED\n")
+
+    assert txn.description == "Starbucks"
+    assert txn.category == "Food"
+    assert txn.amount == -1500
+    assert txn.format_amount() == "-15.00"
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("Today", date(2026, 10, 14)),
+    ("Yesterday", date(2026, 10, 13)),
+    ("Mon, 12 Oct", date(2026, 10, 12)),
+    ("12 October", date(2026, 10, 12)),
+    ("October 12", date(2026, 10, 12)),
+    ("October 12, 2024", date(2024, 10, 12)),
+    ("Sat, 12 October 2024", date(2024, 10, 12)),
+    # Without a year a date after today belongs to last year.
+    ("Sat, 20 Dec", date(2025, 12, 20)),
+    ("29 February", date(2024, 2, 29)),
+])
+def test_parse_date_header(header, expected):
+    assert parse_date_header(header, today=date(2026, 10, 14)) == expected
+
+
+@pytest.mark.parametrize("header", ["", "Pending", "12 Foo", "31 April 2024"])
+def test_parse_date_header_rejects_non_dates(header):
+    assert parse_date_header(header, today=date(2026, 10, 14)) is None
@@ -0,0 +1,217 @@
+from datetime import date
+
+import pytest
+
+from fake_driver import FakeDriver, header, row
+from wio_exporter.scraper import TransactionScraper
+
+
+@pytest.fixture
+def set_today(monkeypatch):
+    def set_today(today):
+        class FixedDate(date):
+            @classmethod
+            def today(cls):
+                return today
+
+        monkeypatch.setattr("wio_exporter.scraper.date", FixedDate)
+
+    return set_today
+
+
+def history(days, rows_per_day):
+    items = []
+    for day in range(1, days + 1):
+        items.append(header(f"{day} October 2024"))
+        for n in range(rows_per_day):
+            # Every other row repeats, so texts alone cannot locate the overlap.
+            items.append(row("Starbucks", "-15.00") if n % 2 == 0 else row(f"Shop {n}", f"-{n}.00"))
+    return items
+
+
+def expected_rows(items):
+    return sum(kind == "row" for kind, _ in items)
+
+
+def test_exports_every_row_of_a_periodic_history(scrape):
+    items = history(5, 6)
+
+    rows = scrape(FakeDriver(items))
+
+    assert len(rows) == expected_rows(items)
+
+
+def test_failed_drag_does_not_duplicate_rows(scrape):
+    items = history(5, 6)
+
+    rows = scrape(FakeDriver(items, fail_drags=1))
+
+    assert len(rows) == expected_rows(items)
+
+
+def test_rows_loaded_below_the_end_are_exported(scrape):
+    items = history(3, 4)
+    lazy = history(1, 3)[1:]
+
+    rows = scrape(FakeDriver(items, lazy_items=lazy))
+
+    assert len(rows) == expected_rows(items) + len(lazy)
+
+
+@pytest.mark.parametrize("content", [
+    "not json",
+    "5",
+    '[["2026-10-14", "Coffee", 1]]',
+    '{"default": 1}',
+    '{"default": [[["x"], "b", 1]]}',
+    '{"default": [[1, 2, 3]]}',
+    '{"default": [["2026-10-14", "Coffee", true]]}',
+])
+def test_malformed_state_is_ignored(tmp_path, content):
+    state_path = tmp_path / "state.json"
+    state_path.write_text(content, encoding="utf-8")
+
+    scraper = TransactionScraper(FakeDriver([]), state_path=state_path)
+
+    assert scraper._known_ids == set()
+
+
+def test_valid_state_entries_survive_malformed_ones(tmp_path):
+    state_path = tmp_path / "state.json"
+    state_path.write_text('{"default": [["2026-10-14", "Coffee", 1], [1, 2, 3], "x"]}', encoding="utf-8")
+
+    scraper = TransactionScraper(FakeDriver([]), state_path=state_path)
+
+    assert scraper._known_ids == {("2026-10-14", "Coffee", 1)}
+
+
+def test_state_is_kept_per_account(scrape, tmp_path):
+    state_path = tmp_path / "state.json"
+    items = history(2, 4)
+    card = TransactionScraper(FakeDriver(items), state_path=state_path, account="card")
+    assert len(scrape(card.driver, scraper=card)) == expected_rows(items)
+
+    # Another account starts from nothing, and saving it keeps the card's rows.
+    current = TransactionScraper(FakeDriver(items), state_path=state_path, account="current")
+    assert len(scrape(current.driver, scraper=current)) == expected_rows(items)
+
+    card.reset(keep_state=False)
+
+    assert TransactionScraper(FakeDriver([]), state_path=state_path, account="card")._known_ids == set()
+    assert TransactionScraper(FakeDriver([]), state_path=state_path, account="current")._known_ids == current._known_ids
+
+
+def test_second_scrape_after_reset_exports_nothing_new(scrape):
+    items = history(2, 4)
+    driver = FakeDriver(items)
+    scraper = TransactionScraper(driver)
+    assert len(scrape(driver, scraper=scraper)) == expected_rows(items)
+
+    driver.offset = 0
+    scraper.reset(keep_state=True)
+
+    assert scrape(driver, scraper=scraper) == []
+
+
+def test_state_matches_rows_under_a_later_header(scrape, tmp_path, set_today):
+    state_path = tmp_path / "state.json"
+    set_today(date(2026, 10, 14))
+    first = [
+        header("Today"), row("Coffee", "-18.00", "Food"),
+        header("Yesterday"), row("Taxi", "-20.00", "Transport"),
+        header("Mon, 12 Oct"), row("Groceries", "-95.00"),
+    ]
+    assert len(scrape(FakeDriver(first), state_path=state_path)) == 3
+
+    # Two days later the same rows sit under their weekday headers.
+    set_today(date(2026, 10, 16))
+    second = [
+        header("Today"), row("Lunch", "-45.00", "Food"),
+        header("Wed, 14 Oct"), row("Coffee", "-18.00", "Food"),
+        header("Tue, 13 Oct"), row("Taxi", "-20.00", "Transport"),
+        header("Mon, 12 Oct"), row("Groceries", "-95.00"),
+    ]
+    rows = scrape(FakeDriver(second), state_path=state_path)
+
+    assert [r["description"] for r in rows] == ["Lunch"]
+
+
+def test_date_column_holds_the_resolved_date(scrape, set_today):
+    set_today(date(2026, 10, 14))
+    items = [
+        row("Hotel", "-500.00", "Travel"),
+        header("Today"), row("Coffee", "-18.00", "Food"),
+        header("Mon, 12 Oct"), row("Groceries", "-95.00"),
+    ]
+
+    rows = scrape(FakeDriver(items))
+
+    # A row above every header has no date and keeps the column empty.
+    assert [r["date"] for r in rows] == ["", "2026-10-14", "2026-10-12"]
+
+
+def monthly_bills(months):
+    items = []
+    for month in ["Jul", "Jun", "May", "Apr", "Mar"][:months]:
+        items.append(header(f"Sat, 12 {month}"))
+        items += [row(f"Grocer {month}", "-80.00"), row(f"Fuel {month}", "-60.00")]
+        # The list ends on two identical rows, so a short final drag leaves
+        # a text-only match one row too short.
+        items += [row("Netflix", "-39.00", "Entertainment")] * 2
+    return items
+
+
+def test_clamped_final_drag_over_repeated_rows(scrape):
+    items = monthly_bills(5)
+
+    # At this height the last drag moves the list by a single row.
+    rows = scrape(FakeDriver(items, screen_height=360))
+
+    assert len(rows) == expected_rows(items)
+
+
+def test_drag_falling_short_mid_list(scrape):
+    items = monthly_bills(5)
+
+    rows = scrape(FakeDriver(items, screen_height=340, drag_scale=0.6))
+
+    assert len(rows) == expected_rows(items)
+
+
+def test_stops_when_list_is_unchanged_after_a_drag(scrape):
+    driver = FakeDriver(history(1, 3))
+
+    rows = scrape(driver)
+
+    assert len(rows) == 3
+    assert driver.offset == driver.max_offset
+
+
+def test_resume_exports_only_newer_rows(scrape, tmp_path):
+    state_path = tmp_path / "state.json"
+    items = history(4, 5)
+    assert len(scrape(FakeDriver(items), state_path=state_path)) == expected_rows(items)
+
+    newer = [header("5 October 2024"), row("Taxi", "-20.00", "Transport")] + items
+    rows = scrape(FakeDriver(newer), state_path=state_path)
+
+    assert [r["description"] for r in rows] == ["Taxi"]
+
+
+def test_screen_of_identical_rows_is_not_the_end(scrape, caplog):
+    items = [header("Today")] + [row("Coffee", "-18.00", "Food")] * 20
+
+    rows = scrape(FakeDriver(items))
+
+    assert len(rows) == 20
+    assert "Reached the end of the transaction list" in caplog.text
+
+
+def test_unconfirmed_end_is_logged_as_an_error(scrape, caplog):
+    # Only on-screen nodes and no scroll indicator: once the header scrolls
+    # away nothing tells identical screens apart.
+    items = [header("Today")] + [row("Coffee", "-18.00", "Food")] * 20
+
+    scrape(FakeDriver(items, offscreen_nodes=False))
+
+    assert any(r.levelname == "ERROR" and "export may be incomplete" in r.getMessage() for r in caplog.records)
@@ -1,9 +1,10 @@
 import os
 from dataclasses import dataclass
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from pathlib import Path
 
 from dotenv import load_dotenv
+from lxml import etree
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
@@ -34,3 +35,43 @@ class AppiumConfig:
         }
 
 default_config = AppiumConfig()
+
+
+@dataclass
+class ScraperConfig:
+    """Transaction scraper configuration."""
+
+    state_path: Optional[str] = os.getenv("STATE_PATH")
+    account: str = os.getenv("WIO_ACCOUNT", "default")
+
+
+default_scraper_config = ScraperConfig()
+
+
+class TransactionLocators:
+    """Locators for transaction rows in the accessibility tree."""
+
+    transaction_xpath: str = (
+        "//XCUIElementTypeStaticText"
+        "[@visible='true' and (contains(@value, 'AED') or contains(@label, 'AED'))]"
+    )
+    date_header_pattern: str = (
+        "^(Today|Yesterday|([A-Za-z]+, )?([0-9]{1,2} [A-Za-z]+|[A-Za-z]+ [0-9]{1,2})(,? [0-9]{4})?)$"
+    )
+    # Headers scrolled off screen are kept: they still date the rows below
+    # them and anchor how far the list moved between snapshots.
+    date_header_xpath: str = (
+        "//XCUIElementTypeStaticText["
+        f"re:test(@value, '{date_header_pattern}') or re:test(@label, '{date_header_pattern}')]"
+    )
+    # The scroll indicator's value ("45%") tracks the list's offset whatever
+    # the rows look like.
+    scroll_bar_xpath: str = "//XCUIElementTypeOther[starts-with(@name, 'Vertical scroll bar')]"
+
+
+TXN_XPATH = etree.XPath(TransactionLocators.transaction_xpath)
+DATE_XPATH = etree.XPath(
+    TransactionLocators.date_header_xpath,
+    namespaces={"re": "http://exslt.org/regular-expressions"},
+)
+SCROLL_BAR_XPATH = etree.XPath(TransactionLocators.scroll_bar_xpath)
@@ -1,43 +1,76 @@
-import csv
 import logging
 from pathlib import Path
-from typing import List
+from typing import BinaryIO, Iterable, List, Optional
 from datetime import datetime
 
 from .parser import Transaction
 
 logger = logging.getLogger(__name__)
 
+CSV_HEADER = b"date,description,amount,currency,category\n"
+WRITE_BATCH_SIZE = 1024
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
 
 class CSVExporter:
 
-    def __init__(self, output_dir: str = "output"):
+    def __init__(self, output_dir: str = "output", filename: str = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
 
-    def export(self, transactions: List[Transaction], filename: str = None) -> Path:
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"wio_transactions_{timestamp}.csv"
 
-        filepath = self.output_dir / filename
+        self.filepath = self.output_dir / filename
+        self.row_count = 0
+        self._file: Optional[BinaryIO] = None
+        self._pending: List[bytes] = []
+
+    def __enter__(self) -> "CSVExporter":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
-        logger.info(f"Exporting {len(transactions)} transactions to {filepath}")
+    def open(self) -> "CSVExporter":
+        logger.info(f"Exporting transactions to {self.filepath}")
 
-        with open(filepath, "w", newline="", encoding="utf-8") as csvfile:
-            fieldnames = ["date", "description", "amount", "currency", "category"]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        self._file = open(self.filepath, "wb", buffering=1 << 20)
+        self._file.write(CSV_HEADER)
+        self.row_count = 0
+        return self
 
-            writer.writeheader()
+    def write_row(self, txn: Transaction):
+        line = (
+            f"{_quote(txn.date)},{_quote(txn.description)},"
+            f"{txn.format_amount()},{txn.currency},{_quote(txn.category or '')}\n"
+        )
+        self._pending.append(line.encode("utf-8"))
+        self.row_count += 1
 
+        if len(self._pending) >= WRITE_BATCH_SIZE:
+            self._flush_pending()
+
+    def _flush_pending(self):
+        self._file.writelines(self._pending)
+        self._pending.clear()
+
+    def close(self):
+        if self._file is None:
+            return
+
+        self._flush_pending()
+        self._file.close()
+        self._file = None
+        logger.info(f"Export completed: {self.row_count} transactions in {self.filepath}")
+
+    def export(self, transactions: Iterable[Transaction]) -> Path:
+        with self:
             for txn in transactions:
-                writer.writerow({
-                    "date": txn.date,
-                    "description": txn.description,
-                    "amount": str(txn.amount),
-                    "currency": txn.currency,
-                    "category": txn.category or "",
-                })
-
-        logger.info(f"Export completed: {filepath}")
-        return filepath
+                self.write_row(txn)
+
+        return self.filepath
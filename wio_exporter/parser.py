@@ -1,60 +1,111 @@
 import re
 from dataclasses import dataclass
+from datetime import date, timedelta
 from typing import Optional
-from decimal import Decimal
 
+_AMOUNT_RE = re.compile(r'[+-]?\d+\.?\d*')
+_HAS_DIGIT_RE = re.compile(r'\d')
+_DATE_HEADER_RE = re.compile(
+    r'^(?:[A-Za-z]+, )?(?:(?P<day>\d{1,2}) (?P<month>[A-Za-z]+)|(?P<month_first>[A-Za-z]+) (?P<day_last>\d{1,2}))'
+    r'(?:,? (?P<year>\d{4}))?$'
+)
+_MONTHS = {name: number for number, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1
+)}
+
+
+def parse_date_header(header: str, today: date) -> Optional[date]:
+    """Resolve a date header as the app shows it ("Today", "Mon, 12 Oct",
+    "October 12, 2024") to a calendar date.
+
+    Headers without a year refer to the latest such date not after
+    ``today``. Returns None for text that is not a recognisable date.
+    """
+    if header == "Today":
+        return today
+    if header == "Yesterday":
+        return today - timedelta(days=1)
+
+    match = _DATE_HEADER_RE.match(header or "")
+    if not match:
+        return None
+
+    month = _MONTHS.get((match["month"] or match["month_first"])[:3].lower())
+    day = int(match["day"] or match["day_last"])
+    if month is None:
+        return None
+
+    if match["year"]:
+        years = [int(match["year"])]
+    else:
+        # Eight years back always reaches a leap year for 29 February.
+        years = range(today.year, today.year - 8, -1)
 
-@dataclass
+    for year in years:
+        try:
+            resolved = date(year, month, day)
+        except ValueError:
+            continue
+        if match["year"] or resolved <= today:
+            return resolved
+
+    return None
+
+
+@dataclass(frozen=True, slots=True)
 class Transaction:
 
     date: str
     description: str
-    amount: Decimal
+    amount: int  # fils (1/100 AED)
     currency: str
     category: Optional[str] = None
     foreign_amount: Optional[str] = None
 
-    def __hash__(self):
-        return hash((self.date, self.description, str(self.amount), self.currency))
-
     def is_spending(self) -> bool:
         return self.amount < 0
 
+    def format_amount(self) -> str:
+        whole, cents = divmod(abs(self.amount), 100)
+        sign = "-" if self.amount < 0 else ""
+        return f"{sign}{whole}.{cents:02d}"
+
 class TransactionParser:
 
     def __init__(self, current_date_header: str = ""):
         self.current_date = current_date_header
 
     def parse_transaction(self, element_text: str) -> Optional[Transaction]:
-        if not element_text or "AED" not in element_text:
+        aed_pos = element_text.find("AED") if element_text else -1
+        if aed_pos < 0:
             return None
 
-        lines = [line.strip() for line in element_text.split("\n") if line.strip()]
+        line_start = element_text.rfind("\n", 0, aed_pos) + 1
+        line_end = element_text.find("\n", aed_pos)
+        if line_end < 0:
+            line_end = len(element_text)
+
+        description_lines = [line for line in map(str.strip, element_text[:line_start].split("\n")) if line]
+        next_line = next((line for line in map(str.strip, element_text[line_end + 1:].split("\n")) if line), None)
+
+        if not description_lines and next_line is None:
+            return None
 
-        if len(lines) < 2:
+        aed_amount = self._extract_amount(element_text[line_start:line_end])
+        if aed_amount is None:
             return None
 
-        aed_amount = None
         foreign_amount = None
-        description_lines = []
         category = None
 
-        for i, line in enumerate(lines):
-            if "AED" in line:
-                aed_amount = self._extract_amount(line)
-                if i + 1 < len(lines) and ("THB" in lines[i + 1] or "USD" in lines[i + 1]):
-                    foreign_amount = lines[i + 1]
-                description_lines = lines[:i]
-                break
-
-        if aed_amount is None:
-            return None
+        if next_line and ("THB" in next_line or "USD" in next_line):
+            foreign_amount = next_line
 
         description = description_lines[0] if description_lines else "Unknown"
 
         if len(description_lines) > 1:
             potential_category = description_lines[1]
-            if potential_category and not re.search(r'\d', potential_category):
+            if potential_category and not _HAS_DIGIT_RE.search(potential_category):
                 category = potential_category
                 if len(description_lines) == 2:
                     pass
@@ -71,14 +122,14 @@ class TransactionParser:
         )
 
     @staticmethod
-    def _extract_amount(amount_str: str) -> Optional[Decimal]:
-        cleaned = amount_str.replace("AED", "").replace(",", "").strip()
+    def _extract_amount(amount_str: str) -> Optional[int]:
+        cleaned = amount_str.replace("AED", "").replace(",", "")
 
-        match = re.search(r'[+-]?\d+\.?\d*', cleaned)
+        match = _AMOUNT_RE.search(cleaned)
         if match:
-            try:
-                return Decimal(match.group())
-            except:
-                return None
+            # Amounts are whole fils; digits past the second decimal are
+            # truncated towards zero rather than rounded.
+            whole, _, fraction = match.group().partition(".")
+            return int(whole + (fraction + "00")[:2])
 
         return None
@@ -1,141 +1,361 @@
 
+import json
 import logging
-import time
-from typing import List, Set, Dict, Optional
+from collections import Counter
+from dataclasses import dataclass, replace
+from datetime import date
+from pathlib import Path
+from typing import Iterable, List, Set, Dict, Optional, Tuple
 from appium import webdriver
-from appium.webdriver.common.appiumby import AppiumBy
+from lxml import etree
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
 
-from .parser import TransactionParser, Transaction
+from .config import DATE_XPATH, SCROLL_BAR_XPATH, TXN_XPATH
+from .exporter import CSVExporter
+from .parser import TransactionParser, Transaction, parse_date_header
 
 logger = logging.getLogger(__name__)
 
+TransactionId = Tuple[str, str, int]
+
+
+def _is_transaction_id(entry) -> bool:
+    return (
+        isinstance(entry, list)
+        and len(entry) == 3
+        and isinstance(entry[0], str)
+        and isinstance(entry[1], str)
+        and type(entry[2]) is int
+    )
+
+
+def _unique_positions(items: Iterable[Tuple[int, str]]) -> Dict[str, int]:
+    items = list(items)
+    counts = Counter(text for _, text in items)
+    return {text: y for y, text in items if counts[text] == 1}
+
+
+@dataclass(frozen=True)
+class _Screen:
+    """One ``mobile: source`` snapshot of the transaction list."""
+
+    rows: List[Dict]
+    headers: List[Tuple[int, str]]  # (y, text), top to bottom
+    scroll_position: Optional[str] = None  # scroll indicator value, when exposed
+
+    def __bool__(self) -> bool:
+        return bool(self.rows)
+
 
 class TransactionScraper:
-    def __init__(self, driver: webdriver.Remote):
+    def __init__(
+        self, driver: webdriver.Remote, state_path: Optional[Path] = None, account: str = "default"
+    ):
         self.driver = driver
         self.parser = TransactionParser()
+        self.state_path = state_path
+        self.account = account
+        self._window_size: Optional[Dict] = None
+        self._known_ids: Set[TransactionId] = self._load_state()
+        self._seen_ids: Set[TransactionId] = set(self._known_ids)
+
+    def reset(self, keep_state: bool = True):
+        self._window_size = None
+
+        if keep_state:
+            self._seen_ids = set(self._known_ids)
+        else:
+            # Forget only this account; the others' entries stay in the file.
+            self._known_ids = set()
+            self._seen_ids = set()
+            self._save_state()
+
+    def scrape_all_transactions(self, writer: CSVExporter) -> int:
+        try:
+            return self._scrape(writer)
+        finally:
+            self._save_state()
+            self._known_ids |= self._seen_ids
 
-    def scrape_all_transactions(self) -> List[Transaction]:
-        transactions: List[Transaction] = []
+    def _scrape(self, writer: CSVExporter) -> int:
+        written = 0
         no_new_count = 0
         max_no_new = 3
-        processed_tx_ids: Set[str] = set()
+        max_known_ratio = 0.8
+        previous: Optional[_Screen] = None
+        scrolled = False
+        current_date = ""
+        today = date.today()
+        occurrences: Dict[Tuple[str, str], int] = {}
 
         while no_new_count < max_no_new:
-            visible_txns = []
             new_count = 0
+            known_count = 0
 
-            for retry in range(3):
-                visible_txns = self._get_visible_transaction_elements()
-                if visible_txns:
-                    break
-                if retry < 2:
-                    logger.warning(f"No visible transactions found, retry {retry + 1}/3...")
-                    time.sleep(0.5)
+            screen = self._wait_for_screen()
+            visible_txns = screen.rows
 
-            logger.info(f"Found {len(visible_txns)} visible transactions")
+            logger.info("Found %d visible transactions", len(visible_txns))
 
             if not visible_txns:
-                logger.warning("No visible transactions found after 3 retries, stopping")
+                logger.warning("No visible transactions appeared within 2s, stopping")
                 break
 
-            visible_txns = [tx for tx in visible_txns if tx.get_attribute('UID') not in processed_tx_ids]
+            if scrolled and screen == previous:
+                screen = self._wait_for_screen(unchanged_from=previous)
+                if not screen:
+                    if previous.scroll_position is None and self._list_shift(previous, previous) is None:
+                        logger.error(
+                            "Visible transactions unchanged after scrolling, but no header, distinct row "
+                            "or scroll indicator confirms the list stopped; the export may be incomplete"
+                        )
+                    else:
+                        logger.warning("Reached the end of the transaction list, stopping")
+                    break
+                visible_txns = screen.rows
+                # The drag did not move the list; rows only arrived below it.
+                scrolled = False
+
+            overlap = self._overlap_length(previous, screen, scrolled)
+            previous = screen
+
+            for i in range(overlap, len(visible_txns)):
+                txn_elem = visible_txns[i]
+                preview = txn_elem["text"].strip()
+                current_date = txn_elem["date"] or current_date
+
+                resolved_date = parse_date_header(current_date, today)
+                if resolved_date:
+                    key = (resolved_date.isoformat(), preview)
+                    occurrences[key] = occurrences.get(key, 0) + 1
+                    txn_id = key + (occurrences[key],)
+
+                    if txn_id in self._known_ids:
+                        known_count += 1
+                        continue
+                    self._seen_ids.add(txn_id)
+                else:
+                    # Without a date the row cannot be told apart across runs,
+                    # so it is exported every time rather than risk dropping it.
+                    logger.debug("No date for %r, not recording it in the state", preview)
 
-            for i, txn_elem in enumerate(visible_txns):
-                txn_data = self._extract_transaction_details(txn_elem, i)
+                txn_data = self._extract_transaction_details(
+                    txn_elem, resolved_date.isoformat() if resolved_date else ""
+                )
 
                 txn = self._parse_transaction(txn_data)
 
                 if txn and txn.is_spending():
-                    transactions.append(txn)
+                    writer.write_row(txn)
+                    written += 1
                     new_count += 1
-                    logger.info(f"[{i}] New: {txn.description} {txn.amount} AED")
+                    logger.info("[%d] New: %s %s AED", i, txn.description, txn.format_amount())
 
+            new_rows = len(visible_txns) - overlap
+            if new_rows and known_count / new_rows > max_known_ratio:
+                logger.info("Reached transactions exported by a previous run, stopping")
+                break
 
             if new_count == 0:
                 no_new_count += 1
-                logger.info(f"No new transactions. Attempt {no_new_count}/{max_no_new}")
+                logger.info("No new transactions. Attempt %d/%d", no_new_count, max_no_new)
             else:
                 no_new_count = 0
 
-            processed_tx_ids.update([tx.get_attribute('UID') for tx in visible_txns])
+            scrolled = no_new_count < max_no_new and self._scroll_to_last_visible(visible_txns)
+
+        return written
+
+    @staticmethod
+    def _list_shift(previous: _Screen, current: _Screen) -> Optional[int]:
+        """How far the list moved up between two snapshots, if it can be told.
+
+        A date header or row whose text appears exactly once in both snapshots
+        is the same element, so its change in position is the list's.
+        """
+        shifts: Counter = Counter()
+        for before, after in (
+            (previous.headers, current.headers),
+            (
+                [(t["center"][1], t["text"]) for t in previous.rows],
+                [(t["center"][1], t["text"]) for t in current.rows],
+            ),
+        ):
+            before_y, after_y = _unique_positions(before), _unique_positions(after)
+            for text in before_y.keys() & after_y.keys():
+                shifts[before_y[text] - after_y[text]] += 1
+
+        if not shifts:
+            return None
+        return shifts.most_common(1)[0][0]
+
+    @classmethod
+    def _overlap_length(cls, previous: Optional[_Screen], current: _Screen, scrolled: bool) -> int:
+        """Count the leading rows of ``current`` already seen in ``previous``.
+
+        A row was seen if, moved back by the list's shift, it lands on a row
+        of ``previous`` with the same text. The shift is measured on anchors
+        where there are any, so drags clamped at the end of the list or
+        falling short are handled; otherwise the drag is assumed to have moved
+        the last row to where the first one was.
+        """
+        if not previous:
+            return 0
+
+        shift = cls._list_shift(previous, current)
+        if shift is None and not scrolled:
+            shift = 0
+        elif shift is None:
+            first_y, last_y = previous.rows[0]["center"][1], previous.rows[-1]["center"][1]
+            shift = last_y - first_y
+            logger.warning(
+                "No header or distinct row to measure the scroll by, assuming the drag moved %d points", shift
+            )
+
+        seen = [(t["center"][1], t["text"]) for t in previous.rows]
+        gaps = [b[0] - a[0] for a, b in zip(seen, seen[1:]) if b[0] > a[0]]
+        tolerance = min(gaps) // 2 if gaps else 0
+
+        overlap = 0
+        for txn in current.rows:
+            y = txn["center"][1] + shift
+            if not any(abs(y - seen_y) <= tolerance and text == txn["text"] for seen_y, text in seen):
+                break
+            overlap += 1
+
+        return overlap
+
+    def _wait_for_screen(self, timeout: float = 2.0, unchanged_from: Optional[_Screen] = None) -> _Screen:
+        def screen_ready(driver) -> Optional[_Screen]:
+            screen = self._read_screen()
+            if unchanged_from is not None and screen == unchanged_from:
+                return None
+            return screen
 
-            if no_new_count < max_no_new:
-                self._scroll_to_last_visible()
+        try:
+            return WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(screen_ready)
+        except TimeoutException:
+            return _Screen([], [])
 
-        return transactions  
+    def _read_state_file(self) -> Dict[str, list]:
+        """Return the state file's seen transactions per account."""
+        if not self.state_path or not self.state_path.exists():
+            return {}
 
-    def _get_visible_transaction_elements(self) -> List:
         try:
-            all_elements = self.driver.find_elements(
-                AppiumBy.XPATH,
-                '//XCUIElementTypeStaticText'
+            accounts = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable state file {self.state_path}: {e}")
+            return {}
+
+        if not isinstance(accounts, dict):
+            logger.warning(f"Ignoring state file {self.state_path}: expected transactions keyed by account")
+            return {}
+
+        return {account: entries for account, entries in accounts.items() if isinstance(entries, list)}
+
+    def _load_state(self) -> Set[TransactionId]:
+        entries = self._read_state_file().get(self.account, [])
+
+        txn_ids = {tuple(entry) for entry in entries if _is_transaction_id(entry)}
+        if self.state_path:
+            logger.info(
+                f"Loaded {len(txn_ids)} previously seen transactions for {self.account} from {self.state_path}"
             )
+        return txn_ids
 
-            window_size = self.driver.get_window_size()
-            screen_height = window_size['height']
-            screen_width = window_size['width']
+    def _save_state(self):
+        if not self.state_path:
+            return
 
-            visible_txns = []
+        # Other accounts' entries are carried over untouched.
+        accounts = self._read_state_file()
+        accounts[self.account] = sorted(self._seen_ids)
 
-            for elem in all_elements:
-                try:
-                    is_visible = elem.get_attribute("visible") == "true"
-                    if not is_visible:
-                        continue
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(accounts), encoding="utf-8")
+        tmp_path.replace(self.state_path)
+        logger.info(f"Saved {len(self._seen_ids)} seen transactions for {self.account} to {self.state_path}")
 
-                    text = elem.get_attribute("value") or elem.get_attribute("label") or ""
-                    if "AED" not in text:
-                        continue
+    def _read_screen(self) -> _Screen:
+        try:
+            source = self.driver.execute_script("mobile: source", {"format": "xml"})
+            tree = etree.fromstring(source.encode("utf-8"))
 
-                    loc = elem.location
-                    size = elem.size
-                    x, y = loc.get('x', 0), loc.get('y', 0)
-                    h = size.get('height', 0)
+            window_size = self._get_window_size()
+            screen_height = window_size['height']
+            screen_width = window_size['width']
 
-                    if y <= 0 or h <= 0:
-                        continue
+            headers = sorted(
+                (int(node.get('y', 0)), node.get("value") or node.get("label"))
+                for node in DATE_XPATH(tree)
+            )
 
-                    if x < 0 or x >= screen_width or y >= screen_height:
-                        continue
+            visible_txns = []
+
+            for node in TXN_XPATH(tree):
+                attrib = node.attrib
+                x, y = int(attrib.get('x', 0)), int(attrib.get('y', 0))
+                w, h = int(attrib.get('width', 0)), int(attrib.get('height', 0))
 
-                    visible_txns.append(elem)
+                if y <= 0 or h <= 0:
+                    continue
 
-                except Exception as e:
+                if x < 0 or x >= screen_width or y >= screen_height:
                     continue
 
-            return visible_txns
+                visible_txns.append({
+                    "text": attrib.get("value") or attrib.get("label") or "",
+                    "center": (x + w // 2, y + h // 2),
+                    "date": next((text for header_y, text in reversed(headers) if header_y < y), None),
+                })
 
-        except Exception as e:
-            logger.error(f"Error getting visible elements: {e}")
-            return []
+            scroll_bar = next(iter(SCROLL_BAR_XPATH(tree)), None)
+            scroll_position = scroll_bar.get("value") if scroll_bar is not None else None
+
+            return _Screen(visible_txns, headers, scroll_position)
 
-    def _extract_transaction_details(self, element, index: int) -> Optional[Dict]:
-        try:
-            preview_text = element.get_attribute("value") or element.get_attribute("label") or ""
-            txn_data = {"preview_text": preview_text}
-            return txn_data
         except Exception as e:
-            logger.error(f"  [{index}] Error extracting details: {e}")
-            return None
+            logger.error("Error getting visible elements: %s", e)
+            return _Screen([], [])
 
-    def _scroll_to_last_visible(self):
-        try:
-            visible_txns = self._get_visible_transaction_elements()
+    def _get_window_size(self) -> Dict:
+        if self._window_size is None:
+            self._window_size = self.driver.get_window_size()
+        return self._window_size
 
-            logger.info(f"Visible transactions: {len(visible_txns)}")
+    def _extract_transaction_details(self, element: Dict, txn_date: str) -> Dict:
+        return {"preview_text": element["text"], "date": txn_date}
 
-            if len(visible_txns) < 2:
-                logger.warning("Not enough visible transactions for element scroll, using swipe fallback")
-                return
+    def _scroll_to_last_visible(self, visible_txns: List[Dict]) -> bool:
+        try:
+            logger.info("Visible transactions: %d", len(visible_txns))
 
-            last_txn = visible_txns[-1]
-            first_txn = visible_txns[0]
+            if len(visible_txns) < 2:
+                logger.warning("Not enough visible transactions to scroll between")
+                return False
+
+            start_x, start_y = visible_txns[-1]["center"]
+            end_x, end_y = visible_txns[0]["center"]
+
+            # Holding at the end of the drag cancels the fling, so the list settles
+            # with the last row at the top without a slow, fixed-duration swipe.
+            self.driver.execute_script("mobile: dragFromToWithVelocity", {
+                "fromX": start_x,
+                "fromY": start_y,
+                "toX": end_x,
+                "toY": end_y,
+                "pressDuration": 0.1,
+                "holdDuration": 0.3,
+                "velocity": 1500,
+            })
+            return True
 
-            self.driver.scroll(last_txn, first_txn, duration=5000)
-            
         except Exception as e:
-            logger.warning(f"Element-based scroll failed: {e}, using swipe fallback")
+            logger.warning("Scroll failed: %s", e)
+            return False
 
     def _parse_transaction(self, txn_data: Dict) -> Optional[Transaction]:
         try:
@@ -146,10 +366,10 @@ class TransactionScraper:
             txn = self.parser.parse_transaction(preview_text)
 
             if txn and txn_data.get("date"):
-                txn.date = txn_data["date"]
+                txn = replace(txn, date=txn_data["date"])
 
             return txn
 
         except Exception as e:
-            logger.error(f"Error parsing transaction: {e}")
+            logger.error("Error parsing transaction: %s", e)
             return None